@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the pure-Python hot paths of the backend.
+Measures time per call and peak allocations (tracemalloc) at several scene
+sizes and compares them against a committed baseline.
+
+Absolute times depend on the machine, so --check only gates on metrics that
+don't: the scaling factor from the smallest to the largest size (catches
+accidental O(n) work) and peak allocations.
+
+Usage:
+    python benchmarks/bench_hotpaths.py             # run and print results
+    python benchmarks/bench_hotpaths.py --check     # fail on regressions vs baseline.json
+    python benchmarks/bench_hotpaths.py --save      # overwrite baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Awaitable
+
+# Add src directory to Python path (same layout as run_backend.py)
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+# Keep the backend's startup logging out of the results table
+with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    import memory
+    import tools
+    import executor
+    import planner
+    import audio_queue
+
+from memory import SceneMemory
+from tools import DirectorTools, parse_model_json
+from executor import ToolExecutor
+from planner import DirectorPlanner
+from audio_queue import TTSJobQueue
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+SIZES = (10, 1_000, 100_000)
+DEFAULT_THRESHOLD = 2.0
+SCALING_SLACK = 1.0  # Absolute slack so flat (~1x) curves don't flap
+PEAK_SLACK_KB = 16.0
+MIN_RUN_SECONDS = 0.2
+
+
+def _quiet(*args, **kwargs) -> None:
+    pass
+
+
+# The hot paths log with print(); measure the work, not stdout I/O
+for module in (memory, tools, executor, planner, audio_queue):
+    module.print = _quiet
+
+
+# --- Fixtures ---
+
+class CannedResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class CannedModel:
+    """Stands in for the Gemini model so only local work is measured."""
+
+    def __init__(self, text: str):
+        self.response = CannedResponse(text)
+
+    def generate_content(self, prompt: str) -> CannedResponse:
+        return self.response
+
+    async def generate_content_async(self, prompt: str) -> CannedResponse:
+        return self.response
+
+
+def make_scene(num_lines: int) -> Dict[str, Any]:
+    actors = [
+        {"id": "hero", "name": "Arjun", "role": "protagonist", "language": "en-US", "voiceId": "v1", "style": "Nervous"},
+        {"id": "ai", "name": "Nexus", "role": "supporting", "language": "en-US", "voiceId": "v2", "style": "Robotic"},
+    ]
+    lines = [
+        {
+            "id": str(uuid.uuid4()),
+            "actorId": actors[i % 2]["id"],
+            "text": f"Line {i}: the server hums while the mystery deepens.",
+            "timestamp": 1_700_000_000_000 + i,
+            "beatIndex": i // 2,
+        }
+        for i in range(num_lines)
+    ]
+    return {
+        "title": "The Golden Hackathon",
+        "genre": "Cyberpunk Mystery",
+        "setting": "A dimly lit server room in New Delhi.",
+        "actors": actors,
+        "lines": lines,
+        "currentBeat": num_lines // 2,
+    }
+
+
+def dialogue_response(num_lines: int) -> str:
+    new_lines = [{"actorId": "hero" if i % 2 else "ai", "text": f"Generated line {i}."} for i in range(num_lines)]
+    return "```json\n" + json.dumps({"newLines": new_lines}) + "\n```"
+
+
+REASONING_RESPONSE = json.dumps({
+    "needs_initialization": False,
+    "dialogue_type": "dialogue",
+    "involved_actors": ["hero", "ai"],
+    "num_lines": 2,
+    "reasoning": "Benchmark",
+})
+
+
+# --- Benchmarks (each returns a callable run once per iteration) ---
+
+def bench_store_scene_state(size: int) -> Callable[[], Any]:
+    # Stored head is extended by one beat of new lines (prefix checked against the head)
+    scene_memory = SceneMemory()
+    scene = make_scene(size)
+    scene_memory.store_scene_state("base", scene)
+    extended = dict(scene, lines=scene["lines"] + make_scene(2)["lines"], currentBeat=scene["currentBeat"] + 1)
+
+    def run():
+        # Start each iteration from the same version (O(1) fork)
+        scene_memory.fork_session("base", "bench")
+        scene_memory.store_scene_state("bench", extended)
+    return run
+
+
+def bench_extend_version(size: int) -> Callable[[], Any]:
+    # Per-turn path: the planner appends a beat to the version the turn started from
+    scene_memory = SceneMemory()
+    scene = make_scene(size)
+    base_version_id = scene_memory.store_scene_state("bench", scene)
+    extended = dict(scene, lines=scene["lines"] + make_scene(2)["lines"], currentBeat=scene["currentBeat"] + 1)
+    return lambda: scene_memory.extend_version("bench", base_version_id, extended)
+
+
+def bench_store_scene_state_new_root(size: int) -> Callable[[], Any]:
+    # Stored state does not extend the head (e.g. a different scene), so a new root is built
+    scene_memory = SceneMemory()
+    scenes = [make_scene(size), make_scene(size)]
+    turn = [0]
+
+    def run():
+        turn[0] ^= 1
+        scene_memory.store_scene_state("bench", scenes[turn[0]])
+    return run
+
+
+def bench_get_recent_context(size: int) -> Callable[[], Any]:
+    scene_memory = SceneMemory()
+    scene = make_scene(size)
+    scene_memory.store_scene_state("bench", scene)
+    return lambda: scene_memory.get_recent_context("bench", num_lines=5)
+
+
+def bench_generate_dialogue(size: int) -> Callable[[], Awaitable[Any]]:
+    dialogue_tools = DirectorTools.__new__(DirectorTools)
+    dialogue_tools.model = CannedModel(dialogue_response(3))
+    scene = make_scene(size)
+    return lambda: dialogue_tools.generate_dialogue(scene, "Reveal the traitor")
+
+
+def bench_reason_about_command(size: int) -> Callable[[], Awaitable[Any]]:
+    director = DirectorPlanner()
+    director.executor = ToolExecutor()
+    director.executor.tools = DirectorTools.__new__(DirectorTools)
+    director.executor.tools.model = CannedModel(REASONING_RESPONSE)
+    director.memory = SceneMemory()
+    context = director._retrieve_context(make_scene(size), "bench")
+    return lambda: director._reason_about_command("Reveal the traitor", context)
+
+
+def bench_parse_model_json(size: int) -> Callable[[], Any]:
+    text = dialogue_response(size)
+    return lambda: parse_model_json(text)
+
+
+def bench_process_execution_results(size: int) -> Callable[[], Awaitable[Any]]:
+    async def synthesize(text: str, voice_id: str) -> str:
+        return ""
+
+    director = DirectorPlanner()
+    director.audio_queue = TTSJobQueue(synthesize, num_workers=1, max_pending=100_000)
+    scene = make_scene(size)
+    plan = {"plan_id": "bench", "actions": []}
+    results = {
+        "success": True,
+        "errors": [],
+        "actions_taken": [{
+            "action": "generate_dialogue",
+            "success": True,
+            "result": parse_model_json(dialogue_response(3))["newLines"],
+        }],
+    }
+
+    async def run():
+        await director._process_execution_results(scene, plan, results, "bench")
+        del scene["lines"][-3:]
+        scene["currentBeat"] -= 1
+    return run
+
+
+BENCHMARKS = {
+    "memory.store_scene_state": bench_store_scene_state,
+    "memory.store_scene_state.new_root": bench_store_scene_state_new_root,
+    "memory.extend_version": bench_extend_version,
+    "memory.get_recent_context": bench_get_recent_context,
+    "tools.generate_dialogue": bench_generate_dialogue,
+    "planner._reason_about_command": bench_reason_about_command,
+    "tools.parse_model_json": bench_parse_model_json,
+    "planner._process_execution_results": bench_process_execution_results,
+}
+
+
+# --- Runner ---
+
+async def _call(fn: Callable[[], Any]) -> None:
+    result = fn()
+    if asyncio.iscoroutine(result):
+        await result
+
+
+async def measure(fn: Callable[[], Any]) -> Dict[str, float]:
+    """Best time per call over several rounds, plus peak allocation of one call."""
+    await _call(fn)  # Warm up
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            await _call(fn)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_RUN_SECONDS or number >= 1_000_000:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(4):
+        start = time.perf_counter()
+        for _ in range(number):
+            await _call(fn)
+        best = min(best, (time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    await _call(fn)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"time_us": round(best * 1e6, 3), "peak_kb": round(peak / 1024, 3)}
+
+
+async def run_benchmarks(names: List[str]) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, float]] = {}
+    scaling: Dict[str, float] = {}
+    for name in names:
+        for size in SIZES:
+            key = f"{name}[{size}]"
+            results[key] = await measure(BENCHMARKS[name](size))
+            print(f"{key:<50} {results[key]['time_us']:>12.2f} us {results[key]['peak_kb']:>12.2f} KB")
+        # Scaling curve: cost at the largest size relative to the smallest
+        small = results[f"{name}[{SIZES[0]}]"]["time_us"]
+        large = results[f"{name}[{SIZES[-1]}]"]["time_us"]
+        scaling[name] = round(large / small, 2) if small else 0.0
+        print(f"{'  scaling ' + str(SIZES[0]) + ' -> ' + str(SIZES[-1]):<50} {scaling[name]:>12.1f}x")
+    return {"results": results, "scaling": scaling}
+
+
+def check_regressions(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    failures = []
+    for name, base_ratio in baseline.get("scaling", {}).items():
+        ratio = current["scaling"].get(name)
+        limit = base_ratio * threshold + SCALING_SLACK
+        if ratio is not None and ratio > limit:
+            failures.append(f"{name} scaling: {ratio}x > {limit:.2f}x (baseline {base_ratio}x)")
+    for key, base in baseline.get("results", {}).items():
+        result = current["results"].get(key)
+        limit = base["peak_kb"] * threshold + PEAK_SLACK_KB
+        if result is not None and result["peak_kb"] > limit:
+            failures.append(f"{key} peak_kb: {result['peak_kb']} > {limit:.2f} (baseline {base['peak_kb']})")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Hot-path micro-benchmarks")
+    parser.add_argument("--check", action="store_true", help="fail if results regress past the baseline threshold")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=None, help="allowed growth factor for scaling and peak allocations (default from baseline)")
+    parser.add_argument("-k", dest="filter", default="", help="only run benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = asyncio.run(run_benchmarks(names))
+
+    if args.save:
+        baseline = {"threshold": args.threshold or DEFAULT_THRESHOLD, **results}
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    if args.check:
+        baseline = json.loads(BASELINE_PATH.read_text())
+        threshold = args.threshold or baseline.get("threshold", DEFAULT_THRESHOLD)
+        failures = check_regressions(results, baseline, threshold)
+        if failures:
+            print(f"Regressions (threshold {threshold}x):")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print(f"No regressions (threshold {threshold}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
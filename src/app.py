@@ -1,10 +1,16 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
 from planner import agent
+from memory import memory
+from audio_queue import audio_queue
+from serialization import FastJSONResponse, SCENE_MEDIA_TYPE, encode_scene, decode_scene
+from scene_store import scene_store
 
-app = FastAPI(title="ManchAI Backend")
+app = FastAPI(title="ManchAI Backend", default_response_class=FastJSONResponse)
 
 # Allow CORS so localhost:3000 (Next.js) can talk to localhost:8000 (Python)
 app.add_middleware(
@@ -15,10 +21,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (e.g. long scene states) for clients that send Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # --- Data Models (Mirroring your TypeScript types) ---
+ActorRole = Literal['protagonist', 'antagonist', 'supporting']
+LanguageCode = Literal['en-US', 'ja-JP', 'es-ES', 'fr-FR', 'de-DE', 'zh-CN', 'ko-KR']
+
+class Actor(BaseModel):
+    id: str
+    name: str
+    role: ActorRole
+    language: LanguageCode
+    voiceId: str
+    style: str
+
+class Line(BaseModel):
+    id: str
+    actorId: str
+    text: str
+    timestamp: int = Field(ge=-2**63, le=2**63 - 1)  # Stored as int64 by the scene store
+    beatIndex: int = Field(ge=-2**31, le=2**31 - 1)  # Stored as int32 by the scene store
+    audioUrl: Optional[str] = None
+    audioJobId: Optional[str] = None
+
+class SceneState(BaseModel):
+    title: str
+    genre: str
+    setting: str
+    actors: List[Actor]
+    lines: List[Line]
+    currentBeat: int
+
 class TurnRequest(BaseModel):
-    sceneState: Optional[Dict[str, Any]] = None
+    sceneState: Optional[SceneState] = None
     userCommand: str
+    takes: int = Field(1, ge=1, le=5)  # Candidate takes generated concurrently; the best one is kept
+    sessionId: str = "default"
+
+class BranchRequest(BaseModel):
+    newSessionId: Optional[str] = None
+    versionId: Optional[str] = None  # Defaults to the session's current version
 
 # --- Routes ---
 
@@ -36,24 +79,156 @@ async def director_turn(request: TurnRequest):
         print(f"[Backend] Received command: '{request.userCommand}'")
         print(f"[Backend] Scene state: {'exists' if request.sceneState else 'null (new scene)'}")
         
-        updated_state = await agent.process_turn(request.sceneState, request.userCommand)
+        scene_state = request.sceneState.model_dump(exclude_none=True) if request.sceneState else None
+        # Count before the turn: the planner extends the lines list in place
+        previous_count = len(scene_state['lines']) if scene_state else 0
+        
+        result = await agent.process_turn_detailed(scene_state, request.userCommand, request.sessionId, request.takes)
+        updated_state = result['sceneState']
         
         # Extract new lines for frontend
-        previous_lines = request.sceneState.get('lines', []) if request.sceneState else []
-        new_lines = updated_state.get('lines', [])[len(previous_lines):]
+        new_lines = updated_state.get('lines', [])[previous_count:]
         
         print(f"[Backend] Generated {len(new_lines)} new lines")
         
-        return {
+        # Returned as a response object so FastAPI skips re-encoding the scene state
+        return FastJSONResponse({
             "sceneState": updated_state,
-            "newLines": new_lines  # Also return new lines for frontend convenience
-        }
+            "newLines": new_lines,  # Also return new lines for frontend convenience
+            "alternateTakes": result['alternates'],
+            "versionId": memory.heads[request.sessionId].version_id
+        })
     except Exception as e:
         print(f"[Backend] Error in turn: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/scene/export")
+async def export_scene(scene_state: SceneState):
+    """
+    Export a scene state in the compact wire format (gzip-compressed JSON).
+    """
+    payload = encode_scene(scene_state.model_dump(exclude_none=True))
+    return Response(
+        content=payload,
+        media_type=SCENE_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="scene.json.gz"'}
+    )
+
+@app.post("/api/scene/import")
+async def import_scene(request: Request):
+    """
+    Import a scene exported by /api/scene/export (plain JSON is accepted too).
+    Returns the validated scene state.
+    """
+    try:
+        scene_state = SceneState.model_validate(decode_scene(await request.body()))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid scene export: {e}")
+    return FastJSONResponse(scene_state.model_dump(exclude_none=True))
+
+@app.get("/api/audio/status")
+async def audio_status(ids: str = Query(..., description="Comma-separated audio job IDs")):
+    """
+    Poll background TTS jobs; finished jobs include their audioUrl.
+    """
+    job_ids = [job_id for job_id in ids.split(",") if job_id]
+    return {"jobs": audio_queue.get_status(job_ids)}
+
+@app.put("/api/scene/{scene_id}")
+async def save_scene(scene_id: str, scene_state: SceneState):
+    """
+    Save a scene into the columnar store so its lines can be paged.
+    """
+    try:
+        line_count = scene_store.save_scene(scene_id, scene_state.model_dump(exclude_none=True))
+    except (ValueError, OverflowError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"sceneId": scene_id, "lineCount": line_count}
+
+@app.get("/api/scene/{scene_id}")
+async def load_scene(scene_id: str):
+    """
+    Export a complete scene state from the columnar store.
+    """
+    try:
+        return FastJSONResponse(scene_store.load_scene(scene_id))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Scene '{scene_id}' not found")
+
+@app.get("/api/scene/{scene_id}/lines")
+async def scene_lines(scene_id: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """
+    Page through the lines of a stored scene.
+    """
+    try:
+        return FastJSONResponse(scene_store.read_lines(scene_id, offset, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Scene '{scene_id}' not found")
+
+@app.get("/api/session/{session_id}/history")
+async def session_history(session_id: str):
+    """
+    List the scene versions of a session, newest first.
+    undoHorizon is the oldest beat the session can still be rolled back to.
+    """
+    return {
+        "sessionId": session_id,
+        "undoHorizon": memory.undo_horizon(session_id),
+        "versions": memory.get_history(session_id)
+    }
+
+@app.post("/api/session/{session_id}/undo")
+async def undo_session(session_id: str, beat: int = Query(..., ge=0)):
+    """
+    Roll a session back to the given beat.
+    Beats older than the session's undoHorizon (see /history) are rejected with 400.
+    """
+    try:
+        scene_state = memory.undo(session_id, beat)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({"sceneState": scene_state, "versionId": memory.heads[session_id].version_id})
+
+@app.post("/api/session/{session_id}/checkout/{version_id}")
+async def checkout_version(session_id: str, version_id: str):
+    """
+    Move a session to any known version (also used to redo after an undo).
+    """
+    try:
+        scene_state = memory.checkout(session_id, version_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return FastJSONResponse({"sceneState": scene_state, "versionId": version_id})
+
+@app.post("/api/session/{session_id}/branch")
+async def branch_session(session_id: str, request: BranchRequest):
+    """
+    Fork a session from its current (or a given) version.
+    """
+    try:
+        new_session_id, version_id = memory.fork_session(session_id, request.newSessionId, request.versionId)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"sessionId": new_session_id, "versionId": version_id}
+
+@app.get("/api/versions/diff")
+async def diff_versions(from_version: str = Query(..., alias="from"), to_version: str = Query(..., alias="to")):
+    """
+    Return only the lines that differ between two versions.
+    """
+    try:
+        return FastJSONResponse(memory.diff_versions(from_version, to_version))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     # Run on port 8000 to avoid conflict with Next.js (3000)
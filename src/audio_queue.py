@@ -0,0 +1,189 @@
+"""
+Audio queue module: background TTS jobs decoupled from turn responses.
+Turns enqueue one job per line and return immediately; asyncio workers
+synthesize the audio and clients poll the job status for the URL.
+"""
+
+import asyncio
+import hashlib
+import importlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from tools import tools
+
+
+class TTSJobQueue:
+    """
+    In-process TTS job queue.
+    - Identical (text, voice) requests share one job
+    - The queue is bounded: submitting waits while it is full (backpressure)
+    - CPU-bound local synthesizers can run in a process pool
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str, str], Awaitable[str]],
+        num_workers: int = 4,
+        max_pending: int = 100,
+        max_jobs: int = 1000,
+        local_synthesizer: Optional[Callable[[str, str], str]] = None,
+        process_workers: int = 0
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            synthesize: Async TTS function (text, voice_id) -> audio URL
+            num_workers: Number of asyncio worker tasks
+            max_pending: Maximum number of queued jobs before submit waits
+            max_jobs: Maximum number of job records kept for status lookups
+            local_synthesizer: Optional picklable sync TTS function run in a
+                process pool instead of `synthesize`
+            process_workers: Size of that process pool
+        """
+        self.synthesize = synthesize
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.local_synthesizer = local_synthesizer
+        self.process_workers = process_workers
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # job_id -> job record
+        self._waiting_lines: Dict[str, List[Dict[str, Any]]] = {}  # job_id -> lines to fill in
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def job_id_for(text: str, voice_id: str) -> str:
+        """Deterministic job ID so identical requests are deduplicated."""
+        return hashlib.sha1(f"{voice_id}\0{text}".encode("utf-8")).hexdigest()[:16]
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # First use (or a new event loop): start a fresh queue and workers.
+        # Jobs still pending on the old loop can never finish, so forget them
+        # (otherwise identical requests would keep attaching to them).
+        for job_id in [j for j, job in self.jobs.items() if job['status'] in ('queued', 'running')]:
+            del self.jobs[job_id]
+            self._waiting_lines.pop(job_id, None)
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._workers = [loop.create_task(self._worker(self._queue)) for _ in range(self.num_workers)]
+        if self.local_synthesizer and self.process_workers > 0 and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.process_workers)
+
+    async def submit(self, text: str, voice_id: str, line: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Enqueue a TTS job, or reuse the existing job for the same text and voice.
+
+        Args:
+            text: Text to synthesize
+            voice_id: Voice identifier
+            line: Optional line dictionary whose audioUrl is set when the job finishes
+
+        Returns:
+            Job record (jobId, status, audioUrl)
+        """
+        self._ensure_workers()
+        job_id = self.job_id_for(text, voice_id)
+        job = self.jobs.get(job_id)
+
+        if job is not None and job['status'] != 'failed':
+            if job['status'] == 'done':
+                if line is not None:
+                    line['audioUrl'] = job['audioUrl']
+            elif line is not None:
+                self._waiting_lines.setdefault(job_id, []).append(line)
+            return job
+
+        job = {'jobId': job_id, 'status': 'queued', 'audioUrl': None, 'error': None}
+        self.jobs[job_id] = job
+        self._trim_jobs()
+        if line is not None:
+            self._waiting_lines.setdefault(job_id, []).append(line)
+        try:
+            # Waits while the queue is full
+            await self._queue.put((job_id, text, voice_id))
+        except BaseException:
+            # Never enqueued (e.g. the request was cancelled while waiting):
+            # drop the record so later identical submissions start a new job
+            if self.jobs.get(job_id) is job:
+                del self.jobs[job_id]
+                self._waiting_lines.pop(job_id, None)
+            raise
+        return job
+
+    def get_status(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up job records.
+
+        Args:
+            job_ids: Job identifiers
+
+        Returns:
+            Dictionary of job_id -> job record (status 'unknown' if not found)
+        """
+        return {
+            job_id: self.jobs.get(job_id, {'jobId': job_id, 'status': 'unknown', 'audioUrl': None, 'error': None})
+            for job_id in job_ids
+        }
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            job_id, text, voice_id = await queue.get()
+            job = self.jobs.get(job_id)
+            try:
+                if job is None:
+                    continue
+                job['status'] = 'running'
+                if self._pool is not None and self.local_synthesizer is not None:
+                    audio_url = await asyncio.get_running_loop().run_in_executor(
+                        self._pool, self.local_synthesizer, text, voice_id
+                    )
+                else:
+                    audio_url = await self.synthesize(text, voice_id)
+                job['audioUrl'] = audio_url
+                job['status'] = 'done'
+                for line in self._waiting_lines.pop(job_id, []):
+                    line['audioUrl'] = audio_url
+            except Exception as e:
+                print(f"[AUDIO QUEUE] Job {job_id} failed: {e}")
+                if job is not None:
+                    job['status'] = 'failed'
+                    job['error'] = str(e)
+                self._waiting_lines.pop(job_id, None)
+            finally:
+                queue.task_done()
+
+    def _trim_jobs(self) -> None:
+        # Drop the oldest finished jobs once over the limit
+        excess = len(self.jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        for job_id in [j for j, job in self.jobs.items() if job['status'] in ('done', 'failed')][:excess]:
+            del self.jobs[job_id]
+
+
+def _load_local_synthesizer(path: Optional[str]) -> Optional[Callable[[str, str], str]]:
+    """Resolve a "module:function" path to a local TTS function."""
+    if not path:
+        return None
+    module_name, _, function_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+# Singleton instance. Local CPU-bound synthesis in a process pool is enabled with
+# TTS_LOCAL_SYNTHESIZER="module:function" and TTS_PROCESS_WORKERS=<n>.
+audio_queue = TTSJobQueue(
+    tools.generate_tts_audio,
+    num_workers=int(os.getenv("TTS_WORKERS", "4")),
+    max_pending=int(os.getenv("TTS_MAX_PENDING", "100")),
+    local_synthesizer=_load_local_synthesizer(os.getenv("TTS_LOCAL_SYNTHESIZER")),
+    process_workers=int(os.getenv("TTS_PROCESS_WORKERS", "0"))
+)
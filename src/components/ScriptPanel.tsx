@@ -336,6 +336,11 @@ export default function ScriptPanel({ sceneState, latestLineId }: ScriptPanelPro
                       )}
                     </button>
 
+                    {/* Audio still being synthesized in the background */}
+                    {!line.audioUrl && line.audioJobId && (
+                      <span className="text-xs text-gray-500 animate-pulse">Generating audio...</span>
+                    )}
+
                     {/* Show audio URL if available (from backend) */}
                     {line.audioUrl && (
                       <div className="flex items-center gap-2">
@@ -3,9 +3,11 @@ Executor module for executing tool calls and LLM operations.
 Handles the "Act" phase of the ReAct pattern.
 """
 
+import asyncio
 import json
 from typing import Dict, Any, List, Optional
 from tools import tools
+from scoring import rank_takes
 
 
 class ToolExecutor:
@@ -14,8 +16,16 @@ class ToolExecutor:
     This is the "executor" that carries out planned actions.
     """
     
-    def __init__(self):
+    def __init__(self, ensemble_threshold: int = 3):
+        """
+        Initialize the executor.
+        
+        Args:
+            ensemble_threshold: Number of involved actors from which dialogue
+                is generated per actor in parallel (ensemble mode)
+        """
         self.tools = tools
+        self.ensemble_threshold = ensemble_threshold
         self.execution_log: List[Dict[str, Any]] = []
     
     async def execute_plan(self, plan: Dict[str, Any], scene_state: Dict[str, Any]) -> Dict[str, Any]:
@@ -69,8 +79,27 @@ class ToolExecutor:
         
         if action_type == 'generate_dialogue':
             # Execute dialogue generation using Gemini
-            user_command = action.get('user_command', '')
-            return await self.tools.generate_dialogue(scene_state, user_command)
+            return await self._generate_dialogue(action, scene_state)
+        
+        elif action_type == 'generate_takes':
+            # Generate several candidate takes concurrently and rank them locally
+            takes = max(1, int(action.get('takes', 1)))
+            # Failed takes raise instead of returning an error line, so they are never ranked
+            results = await asyncio.gather(
+                *[self._generate_dialogue(action, scene_state, raise_errors=True) for _ in range(takes)],
+                return_exceptions=True
+            )
+            candidates = [r for r in results if not isinstance(r, BaseException) and r]
+            if not candidates:
+                errors = [str(r) for r in results if isinstance(r, BaseException)]
+                raise RuntimeError(f"All {takes} takes failed: {errors[0] if errors else 'no lines generated'}")
+            ranked = rank_takes(candidates, scene_state, action.get('user_command', ''))
+            print(f"[EXECUTOR] Ranked {len(ranked)} takes, best score {ranked[0][0]:.2f}")
+            return {
+                'selected': ranked[0][1],
+                'score': ranked[0][0],
+                'alternates': [{'score': score, 'lines': lines} for score, lines in ranked[1:]]
+            }
         
         elif action_type == 'generate_audio':
             # Execute TTS audio generation
@@ -85,6 +114,27 @@ class ToolExecutor:
         else:
             raise ValueError(f"Unknown action type: {action_type}")
     
+    async def _generate_dialogue(self, action: Dict[str, Any], scene_state: Dict[str, Any], raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """
+        Generate one set of dialogue lines, using ensemble mode for larger casts.
+        
+        Args:
+            action: generate_dialogue/generate_takes action dictionary
+            scene_state: Current scene state
+            raise_errors: Raise on model errors instead of returning an error line
+            
+        Returns:
+            List of new line dictionaries (actorId, text)
+        """
+        user_command = action.get('user_command', '')
+        actor_ids = {a.get('id') for a in scene_state.get('actors', [])}
+        involved_actors = [a for a in action.get('involved_actors', []) if a in actor_ids]
+        if len(involved_actors) >= self.ensemble_threshold:
+            # Large cast: one call per speaking actor, run concurrently
+            print(f"[EXECUTOR] Ensemble mode for {len(involved_actors)} actors")
+            return await self.tools.generate_ensemble_dialogue(scene_state, user_command, involved_actors, raise_errors)
+        return await self.tools.generate_dialogue(scene_state, user_command, raise_errors)
+    
     def _initialize_default_scene(self) -> Dict[str, Any]:
         """
         Create a default scene state.
@@ -1,11 +1,71 @@
 """
 Memory module for storing and retrieving scene context and dialogue history.
-Implements a simple in-memory store with context window management.
+Implements a simple in-memory store with context window management and
+versioned scene history (undo, branching, diffs).
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
 from datetime import datetime
+from itertools import islice
 import json
+import operator
+import uuid
+import weakref
+
+
+class SceneVersion:
+    """
+    One immutable version of a scene.
+    Only the lines added since the parent version are stored here; the full
+    script is the chain of chunks back to the root, so versions share all
+    earlier lines with their ancestors and branches.
+    """
+    __slots__ = ('version_id', 'parent', 'beat', 'chunk', 'line_count', 'metadata', 'created_at', '__weakref__')
+    
+    def __init__(
+        self,
+        parent: Optional['SceneVersion'],
+        chunk: Tuple[Dict[str, Any], ...],
+        metadata: Dict[str, Any],
+        version_id: Optional[str] = None,
+        created_at: Optional[str] = None
+    ):
+        self.version_id = version_id or str(uuid.uuid4())
+        self.parent = parent
+        self.chunk = chunk
+        self.metadata = metadata
+        self.beat = metadata.get('currentBeat', 0)
+        self.line_count = (parent.line_count if parent else 0) + len(chunk)
+        self.created_at = created_at or datetime.now().isoformat()
+    
+    def ancestors(self):
+        """Iterate over this version and its ancestors, newest first."""
+        version: Optional[SceneVersion] = self
+        while version is not None:
+            yield version
+            version = version.parent
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'versionId': self.version_id,
+            'parentId': self.parent.version_id if self.parent else None,
+            'beat': self.beat,
+            'lineCount': self.line_count,
+            'addedLines': len(self.chunk),
+            'createdAt': self.created_at
+        }
+
+
+def _lines_between(version: SceneVersion, base: Optional[SceneVersion]) -> List[Dict[str, Any]]:
+    """Lines added on the path from base (exclusive) down to version, in order."""
+    chunks = []
+    base_id = base.version_id if base else None
+    for v in version.ancestors():
+        if v.version_id == base_id:
+            break
+        chunks.append(v.chunk)
+    return [line for chunk in reversed(chunks) for line in chunk]
 
 
 class SceneMemory:
@@ -14,29 +74,305 @@ class SceneMemory:
     Stores scene state, dialogue history, and provides context retrieval.
     """
     
-    def __init__(self, max_history_lines: int = 10):
+    def __init__(self, max_history_lines: int = 10, max_versions: int = 32):
         """
         Initialize memory store.
         
         Args:
             max_history_lines: Maximum number of recent lines to keep in context
+            max_versions: Maximum number of versions kept per session (older
+                ones are squashed or dropped)
         """
         self.max_history_lines = max_history_lines
+        self.max_versions = max_versions
         self.scene_states: Dict[str, Dict[str, Any]] = {}  # session_id -> scene_state
-        self.dialogue_history: Dict[str, List[Dict[str, Any]]] = {}  # session_id -> lines
+        self.heads: Dict[str, SceneVersion] = {}  # session_id -> current version
+        # session_id -> versions it keeps alive (oldest first, capped at max_versions)
+        self.session_versions: Dict[str, "OrderedDict[str, SceneVersion]"] = {}
+        # version_id -> version; entries disappear once no session references them
+        self.versions: "weakref.WeakValueDictionary[str, SceneVersion]" = weakref.WeakValueDictionary()
         
-    def store_scene_state(self, session_id: str, scene_state: Dict[str, Any]) -> None:
+    def store_scene_state(self, session_id: str, scene_state: Dict[str, Any]) -> str:
         """
         Store or update scene state for a session.
         
         Args:
             session_id: Unique identifier for the session
             scene_state: Complete scene state dictionary
+            
+        Returns:
+            ID of the version recorded for the state
+        """
+        self.scene_states[session_id] = scene_state.copy()
+        # Also record a version in the scene history
+        return self._commit_version(session_id, scene_state).version_id
+    
+    def extend_version(self, session_id: str, base_version_id: str, scene_state: Dict[str, Any]) -> str:
+        """
+        Store a scene state whose lines extend a known version (e.g. the state
+        a turn started from plus the lines it generated). Only the new lines
+        are visited; the shared prefix is not compared.
+        
+        Args:
+            session_id: Unique identifier for the session
+            base_version_id: Version whose lines scene_state['lines'] starts with
+            scene_state: Complete scene state dictionary
+            
+        Returns:
+            ID of the new head version
         """
+        base = self.versions.get(base_version_id)
+        lines = scene_state.get('lines', [])
+        if base is None or base.line_count > len(lines):
+            # Base version was dropped meanwhile: fall back to comparing against the head
+            return self.store_scene_state(session_id, scene_state)
+        metadata = {key: value for key, value in scene_state.items() if key != 'lines'}
+        version = SceneVersion(base, tuple(lines[base.line_count:]), metadata)
         self.scene_states[session_id] = scene_state.copy()
-        # Also update dialogue history
-        if 'lines' in scene_state:
-            self.dialogue_history[session_id] = scene_state['lines'].copy()
+        self._set_head(session_id, version)
+        return version.version_id
+    
+    def _commit_version(self, session_id: str, scene_state: Dict[str, Any]) -> SceneVersion:
+        """
+        Record scene_state as the new head version of a session.
+        The new version branches off the newest ancestor of the head whose
+        lines still match (by content, so edited lines are picked up) and
+        only stores the lines after it.
+        """
+        head = self.heads.get(session_id)
+        lines = scene_state.get('lines', [])
+        metadata = {key: value for key, value in scene_state.items() if key != 'lines'}
+        
+        base = self._matching_ancestor(head, lines) if head else None
+        if base is head and head is not None and len(lines) == head.line_count and metadata == head.metadata:
+            return head  # Nothing changed
+        
+        start = base.line_count if base else 0
+        version = SceneVersion(base, tuple(lines[start:]), metadata)
+        self._set_head(session_id, version)
+        return version
+    
+    @staticmethod
+    def _matching_ancestor(head: SceneVersion, lines: List[Dict[str, Any]]) -> Optional[SceneVersion]:
+        """Newest version on head's chain whose full script is a prefix of lines."""
+        chain = list(head.ancestors())
+        chain.reverse()
+        base = None
+        # Walk the chunks against one iterator over lines, so nothing is copied.
+        # Lines carried over from the stored state are the same objects, so
+        # identity is checked first; fresh objects are compared by content.
+        remaining = iter(lines)
+        compare = operator.is_
+        for version in chain:
+            if version.line_count > len(lines):
+                break
+            if not all(map(compare, version.chunk, remaining)):
+                if compare is operator.eq:
+                    break
+                compare = operator.eq
+                remaining = islice(lines, version.line_count - len(version.chunk), None)
+                if not all(map(compare, version.chunk, remaining)):
+                    break
+            base = version
+        return base
+    
+    def _set_head(self, session_id: str, version: SceneVersion) -> None:
+        self.heads[session_id] = version
+        self.versions[version.version_id] = version
+        kept = self.session_versions.setdefault(session_id, OrderedDict())
+        kept[version.version_id] = version
+        kept.move_to_end(version.version_id)
+        # Drop the oldest versions beyond the cap; ones still on the head's chain
+        # stay reachable until _compact squashes them
+        while len(kept) > self.max_versions:
+            kept.popitem(last=False)
+        self._compact(session_id)
+    
+    def _compact(self, session_id: str) -> None:
+        """
+        Bound the head's chain: once it is twice max_versions long, squash
+        the versions below the newest max_versions into one version.
+        Versions still referenced by another session (or by an abandoned
+        branch of this one) are never squashed, so branches keep sharing
+        them. Beats inside the squashed range move behind the session's
+        undo horizon.
+        """
+        chain = list(self.heads[session_id].ancestors())
+        if len(chain) <= 2 * self.max_versions:
+            return
+        cut = self.max_versions
+        floor = self._shared_floor(session_id, {v.version_id: i for i, v in enumerate(chain)})
+        if floor - cut < 2:
+            return  # Nothing unshared to squash
+        
+        base = chain[floor] if floor < len(chain) else None
+        top = chain[cut]
+        parent = SceneVersion(base, tuple(_lines_between(top, base)), top.metadata, top.version_id, top.created_at)
+        rebuilt = [parent]
+        for old in reversed(chain[:cut]):
+            parent = SceneVersion(parent, old.chunk, old.metadata, old.version_id, old.created_at)
+            rebuilt.append(parent)
+        
+        kept = self.session_versions[session_id]
+        for squashed in chain[cut + 1:floor]:
+            kept.pop(squashed.version_id, None)
+        for version in rebuilt:
+            self.versions[version.version_id] = version
+            if version.version_id in kept:
+                kept[version.version_id] = version
+        self.heads[session_id] = parent
+    
+    def _shared_floor(self, session_id: str, chain_index: Dict[str, int]) -> int:
+        """
+        Index in the head's chain (newest first) of the newest version that is
+        referenced from outside that chain, or len(chain_index) if none is.
+        """
+        references = [head for other, head in self.heads.items() if other != session_id]
+        for other, kept in self.session_versions.items():
+            references.extend(v for v in kept.values() if other != session_id or v.version_id not in chain_index)
+        floor = len(chain_index)
+        for reference in references:
+            for version in reference.ancestors():
+                index = chain_index.get(version.version_id)
+                if index is not None:
+                    floor = min(floor, index)
+                    break
+        return floor
+    
+    def _get_version(self, version_id: str) -> SceneVersion:
+        version = self.versions.get(version_id)
+        if version is None:
+            raise KeyError(f"Unknown version: {version_id}")
+        return version
+    
+    def get_version_state(self, version_id: str) -> Dict[str, Any]:
+        """
+        Materialize the full scene state of a version.
+        
+        Args:
+            version_id: Version identifier
+            
+        Returns:
+            Scene state dictionary
+        """
+        version = self._get_version(version_id)
+        scene_state = dict(version.metadata)
+        scene_state['lines'] = _lines_between(version, None)
+        return scene_state
+    
+    def get_history(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        List the versions leading to a session's current head, newest first.
+        
+        Args:
+            session_id: Unique identifier for the session
+            
+        Returns:
+            List of version summaries
+        """
+        head = self.heads.get(session_id)
+        return [v.to_dict() for v in head.ancestors()] if head else []
+    
+    def undo_horizon(self, session_id: str) -> Optional[int]:
+        """
+        Oldest beat a session can still be rolled back to. Older beats are
+        squashed away once the history exceeds twice max_versions.
+        
+        Args:
+            session_id: Unique identifier for the session
+            
+        Returns:
+            Beat number, or None for an unknown session
+        """
+        head = self.heads.get(session_id)
+        return min(v.beat for v in head.ancestors()) if head else None
+    
+    def checkout(self, session_id: str, version_id: str) -> Dict[str, Any]:
+        """
+        Move a session's head to any known version.
+        Later versions are kept, so checking them out again acts as redo.
+        
+        Args:
+            session_id: Unique identifier for the session
+            version_id: Version to move to
+            
+        Returns:
+            Scene state of that version
+        """
+        version = self._get_version(version_id)
+        self._set_head(session_id, version)
+        self.scene_states[session_id] = self.get_version_state(version_id)
+        return self.scene_states[session_id]
+    
+    def undo(self, session_id: str, beat: int) -> Dict[str, Any]:
+        """
+        Roll a session back to the latest version at or before a beat.
+        
+        Args:
+            session_id: Unique identifier for the session
+            beat: Beat to roll back to
+            
+        Returns:
+            Scene state after the undo
+            
+        Raises:
+            KeyError: If the session is unknown
+            ValueError: If the beat is older than the session's undo horizon
+        """
+        head = self.heads.get(session_id)
+        if head is None:
+            raise KeyError(f"Unknown session: {session_id}")
+        target = next((v for v in head.ancestors() if v.beat <= beat), None)
+        if target is None:
+            raise ValueError(f"Beat {beat} is older than the undo horizon (beat {self.undo_horizon(session_id)})")
+        return self.checkout(session_id, target.version_id)
+    
+    def fork_session(self, session_id: str, new_session_id: Optional[str] = None, version_id: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Create a new session branching off an existing version.
+        O(1): the branch shares every line with its parent.
+        
+        Args:
+            session_id: Session to branch from
+            new_session_id: Identifier for the branch (generated if omitted)
+            version_id: Version to branch from (defaults to the current head)
+            
+        Returns:
+            Tuple of (new session id, version id)
+        """
+        if version_id is None:
+            version = self.heads.get(session_id)
+            if version is None:
+                raise KeyError(f"Unknown session: {session_id}")
+        else:
+            version = self._get_version(version_id)
+        new_session_id = new_session_id or str(uuid.uuid4())
+        self.scene_states.pop(new_session_id, None)  # Materialized lazily on first retrieval
+        self._set_head(new_session_id, version)
+        return new_session_id, version.version_id
+    
+    def diff_versions(self, from_version_id: str, to_version_id: str) -> Dict[str, Any]:
+        """
+        Diff two versions. Only lines after their common ancestor are visited.
+        
+        Args:
+            from_version_id: Base version
+            to_version_id: Compared version
+            
+        Returns:
+            Dictionary with the common ancestor and removed/added lines
+        """
+        a = self._get_version(from_version_id)
+        b = self._get_version(to_version_id)
+        a_ancestors = {v.version_id for v in a.ancestors()}
+        base = next((v for v in b.ancestors() if v.version_id in a_ancestors), None)
+        return {
+            'from': a.version_id,
+            'to': b.version_id,
+            'baseVersionId': base.version_id if base else None,
+            'removed': _lines_between(a, base),
+            'added': _lines_between(b, base)
+        }
     
     def retrieve_scene_state(self, session_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -48,7 +384,12 @@ class SceneMemory:
         Returns:
             Scene state dictionary or None if not found
         """
-        return self.scene_states.get(session_id)
+        scene_state = self.scene_states.get(session_id)
+        if scene_state is None and session_id in self.heads:
+            # Forked sessions are materialized on first use
+            scene_state = self.get_version_state(self.heads[session_id].version_id)
+            self.scene_states[session_id] = scene_state
+        return scene_state
     
     def get_recent_context(self, session_id: str, num_lines: int = 5) -> List[Dict[str, Any]]:
         """
@@ -62,9 +403,16 @@ class SceneMemory:
         Returns:
             List of recent dialogue lines
         """
-        history = self.dialogue_history.get(session_id, [])
-        # Return last N lines
-        return history[-num_lines:] if len(history) > num_lines else history
+        head = self.heads.get(session_id)
+        if head is None or num_lines <= 0:
+            return []
+        # Walk back through the version chunks until N lines are collected
+        recent: List[Dict[str, Any]] = []
+        for version in head.ancestors():
+            recent[:0] = version.chunk[-(num_lines - len(recent)):]
+            if len(recent) >= num_lines:
+                break
+        return recent
     
     def get_actor_context(self, session_id: str) -> List[Dict[str, Any]]:
         """
@@ -76,9 +424,9 @@ class SceneMemory:
         Returns:
             List of actor dictionaries
         """
-        scene_state = self.retrieve_scene_state(session_id)
-        if scene_state:
-            return scene_state.get('actors', [])
+        head = self.heads.get(session_id)
+        if head:
+            return head.metadata.get('actors', [])
         return []
     
     def get_scene_metadata(self, session_id: str) -> Dict[str, Any]:
@@ -91,7 +439,7 @@ class SceneMemory:
         Returns:
             Dictionary with title, genre, setting
         """
-        scene_state = self.retrieve_scene_state(session_id)
+        scene_state = self.heads[session_id].metadata if session_id in self.heads else None
         if scene_state:
             return {
                 'title': scene_state.get('title', 'Untitled'),
@@ -115,8 +463,9 @@ class SceneMemory:
         """
         if session_id in self.scene_states:
             del self.scene_states[session_id]
-        if session_id in self.dialogue_history:
-            del self.dialogue_history[session_id]
+        # Versions shared with forked sessions stay alive through those sessions
+        self.heads.pop(session_id, None)
+        self.session_versions.pop(session_id, None)
     
     def log_interaction(self, session_id: str, user_command: str, agent_response: Dict[str, Any]) -> None:
         """
@@ -0,0 +1,49 @@
+import type { NextApiRequest, NextApiResponse } from 'next';
+
+interface AudioJob {
+  jobId: string;
+  status: 'queued' | 'running' | 'done' | 'failed' | 'unknown';
+  audioUrl: string | null;
+  error: string | null;
+}
+
+interface AudioStatusResponse {
+  jobs: Record<string, AudioJob>;
+}
+
+// Backend API URL - defaults to localhost:8000 for development
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:8000';
+
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse<AudioStatusResponse | { error: string }>
+) {
+  if (req.method !== 'GET') {
+    return res.status(405).json({ error: 'Method not allowed' });
+  }
+
+  const ids = typeof req.query.ids === 'string' ? req.query.ids : '';
+  if (!ids) {
+    return res.status(400).json({ error: 'ids is required' });
+  }
+
+  try {
+    // Forward the poll to the Python FastAPI backend
+    const backendResponse = await fetch(
+      `${BACKEND_URL}/api/audio/status?ids=${encodeURIComponent(ids)}`
+    );
+
+    if (!backendResponse.ok) {
+      const errorText = await backendResponse.text();
+      console.error(`[API Route] Audio status error: ${backendResponse.status} - ${errorText}`);
+      return res.status(backendResponse.status).json({ error: errorText });
+    }
+
+    res.status(200).json(await backendResponse.json());
+  } catch (error) {
+    console.error('[API Route] Error polling audio status:', error);
+    res.status(503).json({
+      error: error instanceof Error ? error.message : 'Backend unavailable'
+    });
+  }
+}
@@ -10,6 +10,7 @@ export default function Home() {
   const [sceneState, setSceneState] = useState<SceneState | null>(null);
   const [isProcessing, setIsProcessing] = useState(false);
   const [latestLineId, setLatestLineId] = useState<string | undefined>();
+  const [audioPollTick, setAudioPollTick] = useState(0);
 
   // Function to send commands to the AI Director
   const handleTurn = async (userCommand: string) => {
@@ -54,6 +55,58 @@ export default function Home() {
     }
   };
 
+  // Poll background TTS jobs and merge finished audio URLs into the scene
+  useEffect(() => {
+    const pendingIds = Array.from(new Set(
+      (sceneState?.lines || [])
+        .filter((line) => line.audioJobId && !line.audioUrl)
+        .map((line) => line.audioJobId as string)
+    ));
+    if (pendingIds.length === 0) return;
+
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(`/api/audio/status?ids=${encodeURIComponent(pendingIds.join(','))}`);
+        if (!response.ok) throw new Error(`Audio status error: ${response.status}`);
+        const { jobs } = await response.json();
+
+        const readyUrls: Record<string, string> = {};
+        const failedIds = new Set<string>();
+        for (const jobId of pendingIds) {
+          const job = jobs[jobId];
+          if (job?.status === 'done' && job.audioUrl) {
+            readyUrls[jobId] = job.audioUrl;
+          } else if (!job || job.status === 'failed' || job.status === 'unknown') {
+            failedIds.add(jobId);
+          }
+        }
+        if (Object.keys(readyUrls).length === 0 && failedIds.size === 0) {
+          // Nothing finished yet: poll again
+          setAudioPollTick((tick) => tick + 1);
+          return;
+        }
+
+        setSceneState((prev) => prev && {
+          ...prev,
+          lines: prev.lines.map((line) => {
+            if (!line.audioJobId || line.audioUrl) return line;
+            if (readyUrls[line.audioJobId]) return { ...line, audioUrl: readyUrls[line.audioJobId] };
+            if (failedIds.has(line.audioJobId)) {
+              // Stop polling jobs that will never produce audio
+              return { ...line, audioJobId: undefined };
+            }
+            return line;
+          }),
+        });
+      } catch (error) {
+        console.error('Audio status poll failed:', error);
+        setAudioPollTick((tick) => tick + 1);
+      }
+    }, 1000);
+
+    return () => clearTimeout(timer);
+  }, [sceneState, audioPollTick]);
+
   // Auto-start: Initialize the scene when the page first loads
   useEffect(() => {
     if (!sceneState) {
@@ -9,6 +9,7 @@ import json
 from typing import Optional, Dict, Any, List
 from executor import executor
 from memory import memory
+from audio_queue import audio_queue
 
 
 class DirectorPlanner:
@@ -24,8 +25,9 @@ class DirectorPlanner:
     def __init__(self):
         self.executor = executor
         self.memory = memory
+        self.audio_queue = audio_queue
     
-    async def plan_turn(self, scene_state: Optional[Dict[str, Any]], user_command: str, session_id: str = "default") -> Dict[str, Any]:
+    async def plan_turn(self, scene_state: Optional[Dict[str, Any]], user_command: str, session_id: str = "default", takes: int = 1) -> Dict[str, Any]:
         """
         Main planning method: breaks down user command into sub-tasks.
         
@@ -33,6 +35,7 @@ class DirectorPlanner:
             scene_state: Current scene state (None if new scene)
             user_command: User's director instruction
             session_id: Session identifier for memory
+            takes: Number of candidate takes to generate and rank
             
         Returns:
             Execution plan with sub-tasks
@@ -46,7 +49,7 @@ class DirectorPlanner:
         reasoning = await self._reason_about_command(user_command, context)
         
         # Step 3: Break down into sub-tasks
-        plan = self._create_execution_plan(user_command, context, reasoning)
+        plan = self._create_execution_plan(user_command, context, reasoning, takes)
         
         print(f"[PLANNER] Created plan with {len(plan.get('actions', []))} sub-tasks")
         return plan
@@ -62,9 +65,10 @@ class DirectorPlanner:
         Returns:
             Context dictionary with scene info, recent dialogue, actors
         """
+        version_id = None
         if scene_state:
             # Store current state in memory
-            self.memory.store_scene_state(session_id, scene_state)
+            version_id = self.memory.store_scene_state(session_id, scene_state)
             recent_lines = self.memory.get_recent_context(session_id, num_lines=5)
             actors = self.memory.get_actor_context(session_id)
             metadata = self.memory.get_scene_metadata(session_id)
@@ -84,7 +88,8 @@ class DirectorPlanner:
             'recent_lines': recent_lines,
             'actors': actors,
             'metadata': metadata,
-            'session_id': session_id
+            'session_id': session_id,
+            'version_id': version_id
         }
     
     async def _reason_about_command(self, user_command: str, context: Dict[str, Any]) -> Dict[str, Any]:
@@ -106,7 +111,7 @@ class DirectorPlanner:
         ]) if context['recent_lines'] else "No previous dialogue."
         
         actors_info = ", ".join([
-            f"{a.get('name', 'Unknown')} ({a.get('role', 'unknown')})"
+            f"{a.get('name', 'Unknown')} (id: {a.get('id', 'unknown')}, {a.get('role', 'unknown')})"
             for a in context['actors']
         ]) if context['actors'] else "No actors defined."
         
@@ -156,7 +161,7 @@ Respond in JSON format:
                 "reasoning": "Default reasoning due to parsing error"
             }
     
-    def _create_execution_plan(self, user_command: str, context: Dict[str, Any], reasoning: Dict[str, Any]) -> Dict[str, Any]:
+    def _create_execution_plan(self, user_command: str, context: Dict[str, Any], reasoning: Dict[str, Any], takes: int = 1) -> Dict[str, Any]:
         """
         Create an execution plan with sub-tasks based on reasoning.
         
@@ -164,6 +169,7 @@ Respond in JSON format:
             user_command: User's director instruction
             context: Current context
             reasoning: Reasoning result from Gemini
+            takes: Number of candidate takes to generate and rank
             
         Returns:
             Execution plan with list of actions
@@ -177,14 +183,16 @@ Respond in JSON format:
                 'description': 'Initialize a new scene with default actors and setting'
             })
         
-        # Sub-task 2: Generate dialogue/action lines
+        # Sub-task 2: Generate dialogue/action lines (several ranked takes if requested)
         actions.append({
-            'type': 'generate_dialogue',
-            'description': f"Generate {reasoning.get('num_lines', 2)} lines of {reasoning.get('dialogue_type', 'dialogue')}",
+            'type': 'generate_takes' if takes > 1 else 'generate_dialogue',
+            'description': f"Generate {reasoning.get('num_lines', 2)} lines of {reasoning.get('dialogue_type', 'dialogue')}"
+                           + (f" ({takes} takes)" if takes > 1 else ""),
             'user_command': user_command,
             'dialogue_type': reasoning.get('dialogue_type', 'dialogue'),
             'num_lines': reasoning.get('num_lines', 2),
-            'involved_actors': reasoning.get('involved_actors', [])
+            'involved_actors': reasoning.get('involved_actors', []),
+            'takes': takes
         })
         
         # Sub-task 3: Generate audio for each line (will be done after dialogue generation)
@@ -197,6 +205,7 @@ Respond in JSON format:
             'actions': actions,
             'context': {
                 'session_id': context['session_id'],
+                'version_id': context['version_id'],
                 'current_beat': context['metadata'].get('currentBeat', 0)
             }
         }
@@ -214,12 +223,37 @@ Respond in JSON format:
         Returns:
             Updated scene state
         """
+        result = await self.process_turn_detailed(scene_state, user_command, session_id)
+        return result['sceneState']
+    
+    async def process_turn_detailed(self, scene_state: Optional[Dict[str, Any]], user_command: str, session_id: str = "default", takes: int = 1) -> Dict[str, Any]:
+        """
+        Run a turn and return the updated scene state together with any
+        alternate takes that were generated but not selected.
+        
+        Args:
+            scene_state: Current scene state (None if new scene)
+            user_command: User's director instruction
+            session_id: Session identifier
+            takes: Number of candidate takes to generate and rank
+            
+        Returns:
+            Dictionary with 'sceneState' and 'alternates'
+            
+        Raises:
+            RuntimeError: If every take failed (the scene is left unchanged)
+        """
         # Step 1: PLAN - Break down into sub-tasks
-        plan = await self.plan_turn(scene_state, user_command, session_id)
+        plan = await self.plan_turn(scene_state, user_command, session_id, takes)
         
         # Step 2: EXECUTE - Run the planned actions
         execution_results = await self.executor.execute_plan(plan, scene_state or {})
         
+        # Every take failed: report the error instead of committing an empty turn
+        takes_error = next((e for e in execution_results['errors'] if e['action'] == 'generate_takes'), None)
+        if takes_error:
+            raise RuntimeError(takes_error['error'])
+        
         # Step 3: OBSERVE - Process results and update state
         updated_state = await self._process_execution_results(
             scene_state,
@@ -228,15 +262,23 @@ Respond in JSON format:
             session_id
         )
         
-        # Step 4: STORE - Update memory
-        self.memory.store_scene_state(session_id, updated_state)
+        # Step 4: STORE - Update memory (the turn only appended lines to the version it started from)
+        base_version_id = plan['context']['version_id']
+        if base_version_id:
+            self.memory.extend_version(session_id, base_version_id, updated_state)
+        else:
+            self.memory.store_scene_state(session_id, updated_state)
         self.memory.log_interaction(session_id, user_command, {
             'plan_id': plan['plan_id'],
             'actions_count': len(plan['actions']),
             'success': execution_results['success']
         })
         
-        return updated_state
+        takes_action = next((a for a in execution_results['actions_taken'] if a['action'] == 'generate_takes'), None)
+        return {
+            'sceneState': updated_state,
+            'alternates': takes_action['result']['alternates'] if takes_action else []
+        }
     
     async def _process_execution_results(
         self,
@@ -266,29 +308,33 @@ Respond in JSON format:
                 # Fallback initialization
                 scene_state = self.executor._initialize_default_scene()
         
-        # Extract generated dialogue lines
-        dialogue_action = next((a for a in execution_results['actions_taken'] if a['action'] == 'generate_dialogue'), None)
-        new_lines_data = dialogue_action['result'] if dialogue_action and dialogue_action.get('success') else []
+        # Extract generated dialogue lines (the selected take when several were generated)
+        dialogue_action = next((a for a in execution_results['actions_taken'] if a['action'] in ('generate_dialogue', 'generate_takes')), None)
+        new_lines_data: List[Dict[str, Any]] = []
+        if dialogue_action and dialogue_action.get('success'):
+            if dialogue_action['action'] == 'generate_takes':
+                new_lines_data = dialogue_action['result']['selected']
+            else:
+                new_lines_data = dialogue_action['result']
         
-        # Process each new line: add audio and create full Line objects
+        # Process each new line: create full Line objects (selected take only).
+        # Audio is synthesized in the background; lines carry a job ID until the URL is ready.
+        voice_ids = {a.get('id'): a.get('voiceId', 'default_voice') for a in scene_state.get('actors', [])}
         processed_lines = []
         for line_data in new_lines_data:
-            # Generate audio for this line
-            audio_url = await self.executor._execute_action({
-                'type': 'generate_audio',
-                'text': line_data.get('text', ''),
-                'voice_id': 'default_voice'
-            }, scene_state)
-            
-            # Create full Line object
             full_line = {
                 "id": str(uuid.uuid4()),
                 "actorId": line_data.get('actorId', 'unknown'),
                 "text": line_data.get('text', '...'),
                 "timestamp": int(time.time() * 1000),
-                "beatIndex": scene_state['currentBeat'] + 1,
-                "audioUrl": audio_url
+                "beatIndex": scene_state['currentBeat'] + 1
             }
+            job = await self.audio_queue.submit(
+                full_line['text'],
+                voice_ids.get(full_line['actorId'], 'default_voice'),
+                line=full_line
+            )
+            full_line['audioJobId'] = job['jobId']
             processed_lines.append(full_line)
         
         # Update scene state
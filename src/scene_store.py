@@ -0,0 +1,363 @@
+"""
+Scene store module: columnar, memory-mapped storage for long scenes.
+Each scene is one file holding its lines as columns (an offsets array plus
+a text blob, fixed-width arrays for actorId, beatIndex and timestamp), so
+a page of lines can be read straight out of the mapping without loading
+the whole script.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+# File layout (native byte order throughout so columns can be cast in place,
+# every section aligned to 8 bytes):
+#   header:  magic, format version, byte-order mark, line count
+#   table:   (offset, length) for each section in SECTIONS order
+#   data:    the sections themselves
+MAGIC = b"MNCH"
+FORMAT_VERSION = 2
+BYTE_ORDER_MARK = 0xFEFF  # Reads back as 0xFFFE on a host with the other byte order
+HEADER = struct.Struct("=4sHHQ")
+SECTION_ENTRY = struct.Struct("=QQ")
+SECTIONS = (
+    "meta",          # JSON: title, genre, setting, actors, currentBeat, actor id table
+    "text_offsets",  # Q[n + 1] into text
+    "text",          # UTF-8 blob
+    "id_offsets",    # Q[n + 1] into ids
+    "ids",           # UTF-8 blob
+    "url_offsets",   # Q[n + 1] into urls (empty range = no audio)
+    "urls",          # UTF-8 blob
+    "job_offsets",   # Q[n + 1] into audio_jobs (empty range = no pending audio job)
+    "audio_jobs",    # UTF-8 blob
+    "actor_index",   # I[n] into the meta actor id table
+    "beat_index",    # i[n]
+    "timestamp",     # q[n]
+)
+# Fixed-width sections: name -> (item size, entries beyond line_count)
+COLUMN_SIZES = {
+    "text_offsets": (8, 1),
+    "id_offsets": (8, 1),
+    "url_offsets": (8, 1),
+    "job_offsets": (8, 1),
+    "actor_index": (4, 0),
+    "beat_index": (4, 0),
+    "timestamp": (8, 0),
+}
+SCENE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".scenes")
+
+
+def _pack_strings(values: List[str]) -> tuple:
+    """Encode strings as an offsets array plus a concatenated UTF-8 blob."""
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets.tobytes(), bytes(blob)
+
+
+class ColumnarScene:
+    """
+    A read-only, memory-mapped view of one stored scene.
+    Column arrays are memoryviews over the mapping; nothing is copied until
+    individual lines are decoded.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a scene file.
+
+        Args:
+            path: Path of the scene file
+
+        Raises:
+            ValueError: If the file is not a valid scene file (wrong format,
+                truncated or corrupt)
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._sections: Dict[str, memoryview] = {}
+        try:
+            self._load()
+        except ValueError:
+            self.close()
+            raise
+        except (struct.error, TypeError, KeyError, AttributeError) as e:
+            self.close()
+            raise ValueError(f"Corrupt scene file: {path} ({e})") from e
+
+    def _load(self) -> None:
+        size = os.fstat(self._file.fileno()).st_size
+        table_end = HEADER.size + len(SECTIONS) * SECTION_ENTRY.size
+        # Checked before mapping: mmap rejects empty files
+        if size < table_end:
+            raise ValueError(f"Scene file is truncated ({size} bytes): {self.path}")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, byte_order_mark, line_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a scene file (or unsupported version): {self.path}")
+        if byte_order_mark != BYTE_ORDER_MARK:
+            raise ValueError(f"Scene file was written on a host with a different byte order: {self.path}")
+        self.line_count = line_count
+
+        sections = self._sections
+        for i, name in enumerate(SECTIONS):
+            start, length = SECTION_ENTRY.unpack_from(self._mmap, HEADER.size + i * SECTION_ENTRY.size)
+            if start < table_end or start + length > size:
+                raise ValueError(f"Scene file section '{name}' is out of bounds: {self.path}")
+            sections[name] = self._view[start:start + length]
+
+        # Fixed-width columns must hold one entry per line (offsets arrays one more)
+        for name, (itemsize, extra) in COLUMN_SIZES.items():
+            if len(sections[name]) != (line_count + extra) * itemsize:
+                raise ValueError(f"Scene file section '{name}' has the wrong size: {self.path}")
+
+        self.metadata: Dict[str, Any] = json.loads(bytes(sections["meta"]))
+        self._actor_ids: List[str] = self.metadata.pop("actorIds")
+        self._text = sections["text"]
+        self._ids = sections["ids"]
+        self._urls = sections["urls"]
+        self._audio_jobs = sections["audio_jobs"]
+        self._text_offsets = sections["text_offsets"].cast("Q")
+        self._id_offsets = sections["id_offsets"].cast("Q")
+        self._url_offsets = sections["url_offsets"].cast("Q")
+        self._job_offsets = sections["job_offsets"].cast("Q")
+        self._actor_index = sections["actor_index"].cast("I")
+        self._beat_index = sections["beat_index"].cast("i")
+        self._timestamp = sections["timestamp"].cast("q")
+        self._sections = sections
+
+    def __len__(self) -> int:
+        return self.line_count
+
+    def read_lines(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Read a range of lines.
+
+        Args:
+            offset: Index of the first line to read
+            limit: Maximum number of lines (None reads to the end)
+
+        Returns:
+            List of line dictionaries
+        """
+        start = max(0, min(offset, self.line_count))
+        stop = self.line_count if limit is None else min(self.line_count, start + max(0, limit))
+
+        text_offsets = self._text_offsets
+        id_offsets = self._id_offsets
+        url_offsets = self._url_offsets
+        job_offsets = self._job_offsets
+        lines = []
+        for i in range(start, stop):
+            line = {
+                "id": str(self._ids[id_offsets[i]:id_offsets[i + 1]], "utf-8"),
+                "actorId": self._actor_ids[self._actor_index[i]],
+                "text": str(self._text[text_offsets[i]:text_offsets[i + 1]], "utf-8"),
+                "timestamp": self._timestamp[i],
+                "beatIndex": self._beat_index[i],
+            }
+            if url_offsets[i + 1] > url_offsets[i]:
+                line["audioUrl"] = str(self._urls[url_offsets[i]:url_offsets[i + 1]], "utf-8")
+            if job_offsets[i + 1] > job_offsets[i]:
+                line["audioJobId"] = str(self._audio_jobs[job_offsets[i]:job_offsets[i + 1]], "utf-8")
+            lines.append(line)
+        return lines
+
+    def to_scene_state(self) -> Dict[str, Any]:
+        """
+        Materialize the full scene state dictionary.
+
+        Returns:
+            Scene state dictionary
+        """
+        scene_state = dict(self.metadata)
+        scene_state["lines"] = self.read_lines()
+        return scene_state
+
+    def close(self) -> None:
+        """Release the memoryviews and unmap the file."""
+        for name in ("_text_offsets", "_id_offsets", "_url_offsets", "_job_offsets",
+                     "_actor_index", "_beat_index", "_timestamp"):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+        for view in getattr(self, "_sections", {}).values():
+            view.release()
+        self._sections = {}
+        if self._view is not None:
+            self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+
+class SceneStore:
+    """
+    Stores scenes as columnar files and serves paged reads from them.
+    Keeps at most max_open_scenes mappings open (least recently used are
+    unmapped first) so the resident footprint stays bounded.
+    """
+
+    def __init__(self, root: str, max_open_scenes: int = 8):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding one file per scene
+            max_open_scenes: Maximum number of scenes kept memory-mapped
+        """
+        self.root = root
+        self.max_open_scenes = max_open_scenes
+        self._open: "OrderedDict[str, ColumnarScene]" = OrderedDict()
+
+    def _path(self, scene_id: str) -> str:
+        if not SCENE_ID_PATTERN.match(scene_id):
+            raise ValueError(f"Invalid scene id: {scene_id!r}")
+        return os.path.join(self.root, f"{scene_id}.scene")
+
+    def save_scene(self, scene_id: str, scene_state: Dict[str, Any]) -> int:
+        """
+        Write a scene state to its columnar file, replacing any previous version.
+
+        Args:
+            scene_id: Scene identifier
+            scene_state: Complete scene state dictionary
+
+        Returns:
+            Number of lines stored
+        """
+        path = self._path(scene_id)
+        lines = scene_state.get("lines", [])
+
+        actor_ids: List[str] = []
+        actor_lookup: Dict[str, int] = {}
+        actor_index = array("I")
+        for line in lines:
+            actor_id = line.get("actorId", "unknown")
+            if actor_id not in actor_lookup:
+                actor_lookup[actor_id] = len(actor_ids)
+                actor_ids.append(actor_id)
+            actor_index.append(actor_lookup[actor_id])
+
+        metadata = {key: value for key, value in scene_state.items() if key != "lines"}
+        metadata["actorIds"] = actor_ids
+        text_offsets, text = _pack_strings([line.get("text", "") for line in lines])
+        id_offsets, ids = _pack_strings([line.get("id", "") for line in lines])
+        url_offsets, urls = _pack_strings([line.get("audioUrl") or "" for line in lines])
+        job_offsets, audio_jobs = _pack_strings([line.get("audioJobId") or "" for line in lines])
+        payloads = {
+            "meta": json.dumps(metadata).encode("utf-8"),
+            "text_offsets": text_offsets,
+            "text": text,
+            "id_offsets": id_offsets,
+            "ids": ids,
+            "url_offsets": url_offsets,
+            "urls": urls,
+            "job_offsets": job_offsets,
+            "audio_jobs": audio_jobs,
+            "actor_index": actor_index.tobytes(),
+            "beat_index": array("i", [line.get("beatIndex", 0) for line in lines]).tobytes(),
+            "timestamp": array("q", [line.get("timestamp", 0) for line in lines]).tobytes(),
+        }
+
+        # Unmap the old file before replacing it (required on Windows)
+        self._close(scene_id)
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            position = HEADER.size + len(SECTIONS) * SECTION_ENTRY.size
+            table = []
+            for name in SECTIONS:
+                position += -position % 8
+                table.append((position, len(payloads[name])))
+                position += len(payloads[name])
+
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER_MARK, len(lines)))
+            for entry in table:
+                f.write(SECTION_ENTRY.pack(*entry))
+            for name, (start, _) in zip(SECTIONS, table):
+                f.write(b"\0" * (start - f.tell()))
+                f.write(payloads[name])
+        os.replace(tmp_path, path)
+
+        print(f"[SCENE STORE] Saved scene '{scene_id}' ({len(lines)} lines)")
+        return len(lines)
+
+    def open_scene(self, scene_id: str) -> ColumnarScene:
+        """
+        Get the memory-mapped view of a stored scene.
+
+        Args:
+            scene_id: Scene identifier
+
+        Returns:
+            ColumnarScene for the scene
+
+        Raises:
+            FileNotFoundError: If the scene has not been saved
+        """
+        scene = self._open.get(scene_id)
+        if scene is not None:
+            self._open.move_to_end(scene_id)
+            return scene
+
+        scene = ColumnarScene(self._path(scene_id))
+        self._open[scene_id] = scene
+        while len(self._open) > self.max_open_scenes:
+            _, evicted = self._open.popitem(last=False)
+            evicted.close()
+        return scene
+
+    def read_lines(self, scene_id: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """
+        Read one page of lines from a stored scene.
+
+        Args:
+            scene_id: Scene identifier
+            offset: Index of the first line
+            limit: Maximum number of lines
+
+        Returns:
+            Dictionary with the page of lines and the total line count
+        """
+        scene = self.open_scene(scene_id)
+        return {
+            "sceneId": scene_id,
+            "offset": offset,
+            "limit": limit,
+            "total": len(scene),
+            "lines": scene.read_lines(offset, limit)
+        }
+
+    def load_scene(self, scene_id: str) -> Dict[str, Any]:
+        """
+        Load a complete scene state from the store.
+
+        Args:
+            scene_id: Scene identifier
+
+        Returns:
+            Scene state dictionary
+        """
+        return self.open_scene(scene_id).to_scene_state()
+
+    def _close(self, scene_id: str) -> None:
+        scene = self._open.pop(scene_id, None)
+        if scene is not None:
+            scene.close()
+
+
+# Singleton instance
+scene_store = SceneStore(os.getenv("SCENE_STORE_DIR", DEFAULT_STORE_DIR))
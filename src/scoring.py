@@ -0,0 +1,99 @@
+"""
+Scoring module for ranking candidate takes locally.
+Cheap heuristics only (no model calls): actor-ID validity, overlap with the
+director's instruction, line length and repetition against recent dialogue.
+"""
+
+import re
+from typing import Dict, Any, List, Tuple
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+STOPWORDS = {
+    "the", "and", "that", "this", "with", "have", "from", "they", "them", "their",
+    "there", "then", "than", "what", "when", "where", "which", "while", "will",
+    "would", "should", "could", "into", "about", "make", "more", "some", "very",
+    "just", "your", "you", "for", "are", "was", "were", "been", "being", "let",
+}
+
+# Relative weight of each heuristic
+ACTOR_WEIGHT = 3.0
+KEYWORD_WEIGHT = 2.0
+LENGTH_WEIGHT = 1.0
+REPETITION_WEIGHT = 2.0
+
+MIN_WORDS = 3
+MAX_WORDS = 40
+
+
+def _words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+def _similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def score_take(lines: List[Dict[str, Any]], scene_state: Dict[str, Any], user_command: str, recent_lines: int = 10) -> float:
+    """
+    Score one candidate take. Higher is better.
+
+    Args:
+        lines: Candidate lines ({actorId, text} dictionaries)
+        scene_state: Current scene state
+        user_command: Director's instruction
+        recent_lines: Number of recent scene lines checked for repetition
+
+    Returns:
+        Score of the take
+    """
+    if not lines:
+        return 0.0
+
+    actor_ids = {a.get('id') for a in scene_state.get('actors', [])}
+    keywords = {w for w in _words(user_command) if len(w) > 3 and w not in STOPWORDS}
+    previous = [set(_words(l.get('text', ''))) for l in scene_state.get('lines', [])[-recent_lines:]]
+
+    valid_actors = 0
+    good_length = 0
+    take_words = set()
+    repetition = 0.0
+    for line in lines:
+        words = _words(line.get('text', ''))
+        word_set = set(words)
+        if line.get('actorId') in actor_ids:
+            valid_actors += 1
+        if MIN_WORDS <= len(words) <= MAX_WORDS:
+            good_length += 1
+        # Compare against recent dialogue and earlier lines of the same take
+        for other in previous:
+            repetition = max(repetition, _similarity(word_set, other))
+        previous.append(word_set)
+        take_words |= word_set
+
+    keyword_overlap = len(keywords & take_words) / len(keywords) if keywords else 1.0
+
+    return (
+        ACTOR_WEIGHT * valid_actors / len(lines)
+        + KEYWORD_WEIGHT * keyword_overlap
+        + LENGTH_WEIGHT * good_length / len(lines)
+        - REPETITION_WEIGHT * repetition
+    )
+
+
+def rank_takes(takes: List[List[Dict[str, Any]]], scene_state: Dict[str, Any], user_command: str) -> List[Tuple[float, List[Dict[str, Any]]]]:
+    """
+    Rank candidate takes, best first.
+
+    Args:
+        takes: Candidate takes (each a list of lines)
+        scene_state: Current scene state
+        user_command: Director's instruction
+
+    Returns:
+        List of (score, take) tuples sorted by descending score
+    """
+    scored = [(score_take(take, scene_state, user_command), take) for take in takes]
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored
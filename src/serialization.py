@@ -0,0 +1,92 @@
+"""
+Serialization module for the wire formats used by the backend.
+Provides fast JSON encoding (orjson when installed) and a compact gzip
+format for scene export/import.
+"""
+
+import gzip
+import json
+from typing import Any, Dict
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to the standard library
+    orjson = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+SCENE_MEDIA_TYPE = "application/gzip"
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode an object as compact UTF-8 JSON bytes.
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        Encoded JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """
+    Decode JSON bytes.
+
+    Args:
+        data: Encoded JSON bytes
+
+    Returns:
+        Decoded object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_scene(scene_state: Dict[str, Any], compresslevel: int = 6) -> bytes:
+    """
+    Encode a scene state into the compact export format (gzip-compressed JSON).
+
+    Args:
+        scene_state: Complete scene state dictionary
+        compresslevel: gzip compression level (1-9)
+
+    Returns:
+        Compressed scene bytes
+    """
+    return gzip.compress(dumps(scene_state), compresslevel=compresslevel)
+
+
+def decode_scene(data: bytes) -> Dict[str, Any]:
+    """
+    Decode a scene previously produced by encode_scene.
+    Plain (uncompressed) JSON is accepted as well.
+
+    Args:
+        data: Exported scene bytes
+
+    Returns:
+        Scene state dictionary
+    """
+    if data[:2] == GZIP_MAGIC:
+        data = gzip.decompress(data)
+    scene_state = loads(data)
+    if not isinstance(scene_state, dict):
+        raise ValueError("Scene export must contain a JSON object")
+    return scene_state
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response that renders with orjson when available.
+    Routes return this directly so FastAPI skips its jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
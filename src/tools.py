@@ -34,6 +34,15 @@ if GEMINI_API_KEY:
 else:
     print("[WARNING] Gemini API not configured - API calls will fail!")
 
+
+def parse_model_json(text: str):
+    """
+    Parse a JSON model response, stripping any markdown code fences.
+    """
+    clean_text = text.replace("```json", "").replace("```", "").strip()
+    return json.loads(clean_text)
+
+
 class DirectorTools:
     def __init__(self):
         # Use available models - gemini-2.0-flash is widely available
@@ -54,9 +63,10 @@ class DirectorTools:
                 except Exception as e3:
                     raise ValueError(f"Could not initialize any Gemini model. Last error: {e3}")
 
-    async def generate_dialogue(self, scene_state: dict, user_command: str) -> list:
+    async def generate_dialogue(self, scene_state: dict, user_command: str, raise_errors: bool = False) -> list:
         """
         Uses Gemini to generate new dialogue lines based on the scene state and user command.
+        Errors become a single "system" line unless raise_errors is set.
         """
         # Construct the context from the last 5 lines to save tokens
         recent_lines = scene_state.get('lines', [])[-5:]
@@ -97,16 +107,135 @@ Use the exact actor IDs from the character list above. Make sure the dialogue di
 """
 
         try:
-            response = self.model.generate_content(prompt)
+            # Async call so concurrent takes don't block the event loop
+            response = await self.model.generate_content_async(prompt)
             # Clean up potential markdown formatting from the response
-            clean_text = response.text.replace("```json", "").replace("```", "").strip()
-            data = json.loads(clean_text)
+            data = parse_model_json(response.text)
             return data.get("newLines", [])
         except Exception as e:
             print(f"Error generating dialogue: {e}")
+            if raise_errors:
+                raise
             # Fallback error line
             return [{"actorId": "system", "text": f"Error parsing script: {str(e)}"}]
 
+    async def generate_ensemble_dialogue(self, scene_state: dict, user_command: str, actor_ids: list, raise_errors: bool = False) -> list:
+        """
+        Ensemble mode for larger casts: a short skeleton call decides who speaks
+        and what each turn is about, then every actor's lines are written by a
+        separate, concurrent call with that actor's style and voice, and the
+        results are merged back in turn order.
+        """
+        actors = {a['id']: a for a in scene_state.get('actors', [])}
+        actor_ids = [actor_id for actor_id in actor_ids if actor_id in actors]
+
+        recent_lines = scene_state.get('lines', [])[-5:]
+        history_text = "\n".join([f"{l['actorId']}: {l['text']}" for l in recent_lines])
+        history_text = history_text or "(Scene just started - no previous dialogue)"
+        cast_text = "\n".join([
+            f"- {actors[actor_id]['name']} (id: {actor_id}, {actors[actor_id].get('role', 'supporting')})"
+            for actor_id in actor_ids
+        ])
+
+        skeleton_prompt = f"""You are a professional scriptwriter planning the next beat of a movie scene.
+
+SCENE CONTEXT:
+- Setting: {scene_state.get('setting', 'Unknown')}
+- Speaking characters:
+{cast_text}
+- Recent Dialogue:
+{history_text}
+
+DIRECTOR'S INSTRUCTION: "{user_command}"
+
+TASK:
+Plan {len(actor_ids)} to {len(actor_ids) + 2} speaking turns that fulfill the director's instruction.
+For each turn give the speaker's id and a one-sentence summary of what they say or do. Do NOT write the dialogue itself.
+
+Return ONLY raw JSON (no markdown, no explanations). Format:
+{{
+    "turns": [
+        {{ "actorId": "{actor_ids[0] if actor_ids else 'hero'}", "intent": "What this turn accomplishes..." }}
+    ]
+}}
+"""
+
+        try:
+            response = await self.model.generate_content_async(skeleton_prompt)
+            turns = [
+                turn for turn in parse_model_json(response.text).get("turns", [])
+                if turn.get('actorId') in actors
+            ]
+        except Exception as e:
+            print(f"[TOOLS] Ensemble skeleton failed, using single prompt: {e}")
+            return await self.generate_dialogue(scene_state, user_command, raise_errors)
+
+        if not turns:
+            return await self.generate_dialogue(scene_state, user_command, raise_errors)
+
+        # Group turn intents per actor, keeping first-appearance order
+        intents_by_actor: dict = {}
+        for turn in turns:
+            intents_by_actor.setdefault(turn['actorId'], []).append(turn.get('intent', ''))
+
+        results = await asyncio.gather(*[
+            self._generate_actor_lines(actors[actor_id], intents, history_text, scene_state, user_command)
+            for actor_id, intents in intents_by_actor.items()
+        ], return_exceptions=True)
+
+        lines_by_actor = {}
+        for actor_id, result in zip(intents_by_actor, results):
+            if isinstance(result, BaseException):
+                print(f"[TOOLS] Ensemble lines failed for {actor_id}: {result}")
+                continue
+            lines_by_actor[actor_id] = iter(result)
+
+        # Merge back in skeleton turn order
+        new_lines = []
+        for turn in turns:
+            text = next(lines_by_actor.get(turn['actorId'], iter(())), None)
+            if text:
+                new_lines.append({"actorId": turn['actorId'], "text": text})
+
+        if not new_lines:
+            return await self.generate_dialogue(scene_state, user_command, raise_errors)
+        return new_lines
+
+    async def _generate_actor_lines(self, actor: dict, intents: list, history_text: str, scene_state: dict, user_command: str) -> list:
+        """
+        Writes the lines for one actor's turns in that actor's own voice.
+        """
+        turns_text = "\n".join([f"{i + 1}. {intent}" for i, intent in enumerate(intents)])
+
+        prompt = f"""You are writing the lines of a single character in a movie scene.
+
+CHARACTER:
+- Name: {actor.get('name', 'Unknown')}
+- Role: {actor.get('role', 'supporting')}
+- Style: {actor.get('style', 'Neutral')}
+- Language: {actor.get('language', 'en-US')} (write the lines in this language)
+
+SCENE CONTEXT:
+- Setting: {scene_state.get('setting', 'Unknown')}
+- Recent Dialogue:
+{history_text}
+
+DIRECTOR'S INSTRUCTION: "{user_command}"
+
+TASK:
+Write exactly {len(intents)} line(s) for {actor.get('name', 'this character')}, one per turn below, in their style:
+{turns_text}
+
+Return ONLY raw JSON (no markdown, no explanations). Format:
+{{
+    "lines": ["Line for turn 1..."]
+}}
+"""
+
+        response = await self.model.generate_content_async(prompt)
+        lines = parse_model_json(response.text).get("lines", [])
+        return [str(line) for line in lines][:len(intents)]
+
     async def generate_tts_audio(self, text: str, voice_id: str) -> str:
         """
         Mocks the Text-to-Speech generation.
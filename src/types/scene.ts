@@ -18,6 +18,7 @@ export interface Line {
   timestamp: number;
   beatIndex: number;
   audioUrl?: string;
+  audioJobId?: string;
 }
 
 export interface SceneState {